@@ -2,9 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from pathlib import Path
-import traceback
+import os
 
 try:
     # Works when the package is discoverable on sys.path (py2app bundle, `python -m`).
@@ -13,20 +11,45 @@ except ModuleNotFoundError:  # pragma: no cover - fallback for direct script exe
     # Allow `python diskviz/__main__.py` by injecting the project root.
     import sys
 
-    project_root = Path(__file__).resolve().parent.parent
-    if str(project_root) not in sys.path:
-        sys.path.insert(0, str(project_root))
+    # os.path.abspath avoids the realpath() syscalls that Path.resolve() performs.
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
     from diskviz.app import run_app  # type: ignore
 
+# The launch log location is fixed per user, so resolve it once at import.
+_LOG_PATH = os.path.join(os.path.expanduser("~"), "Library", "Logs", "DiskViz-launch.log")
+_LOG_DIR = os.path.dirname(_LOG_PATH)
+_LOG_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+_LOG_DIR_READY = False
+
 
 def _log_launch_exception(exc: BaseException) -> None:
     """Write the exception to ~/Library/Logs/DiskViz-launch.log for debugging."""
+    global _LOG_DIR_READY
     try:
-        log_path = Path.home() / "Library" / "Logs" / "DiskViz-launch.log"
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        with log_path.open("a", encoding="utf-8") as fh:
-            fh.write(f"\n[{datetime.now().isoformat(timespec='seconds')}]\n")
-            fh.writelines(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        # Imported here so a successful launch never pays for these modules.
+        from datetime import datetime
+        from traceback import format_exception
+
+        payload = (
+            f"\n[{datetime.now().isoformat(timespec='seconds')}]\n"
+            + "".join(format_exception(type(exc), exc, exc.__traceback__))
+        ).encode("utf-8")
+        # One unbuffered append: no TextIOWrapper/BufferedWriter on a dying process.
+        # Open optimistically and only create ~/Library/Logs when it is missing.
+        try:
+            fd = os.open(_LOG_PATH, _LOG_FLAGS, 0o600)
+        except FileNotFoundError:
+            if _LOG_DIR_READY:
+                raise
+            os.makedirs(_LOG_DIR, exist_ok=True)
+            _LOG_DIR_READY = True
+            fd = os.open(_LOG_PATH, _LOG_FLAGS, 0o600)
+        try:
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
     except Exception:
         # If logging fails we do not want to mask the original exception.
         pass
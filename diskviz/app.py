@@ -2,33 +2,47 @@
 
 from __future__ import annotations
 
+import hashlib
+import heapq
 import math
 import os
-import queue
+import platform
 import shutil
 import subprocess
 import threading
 import tkinter as tk
+import tkinter.font as tkfont
+from array import array
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set
 
 from .model import DiskNode
-from .scanner import ScanStats, flatten_snapshot, scan_directory
-from .treemap import NodeRect, Rect, filter_layout, slice_and_dice
+from .scanner import ScanStats, rescan_directory, scan_directory
+from .search import TrigramIndex
+from .treemap import NodeRect, Rect, cached_slice_and_dice, clear_layout_cache, count_unlaid, match_mask
 
 # UI Constants
 DEFAULT_WINDOW_SIZE = "1100x700"
 DEFAULT_SCAN_DEPTH = 4
 MONITOR_INTERVAL_MS = 5000
-MAX_SCAN_QUEUE_SIZE = 2
+SEARCH_DEBOUNCE_MS = 120
+RESIZE_DEBOUNCE_MS = 80
+HOVER_THROTTLE_MS = 30
+HIT_GRID_CELLS = 32  # Hit-test grid is HIT_GRID_CELLS x HIT_GRID_CELLS buckets
 
 # Canvas & palette constants (SpaceSniffer style)
 CANVAS_BG_COLOR = "#0E1018"
 RECT_INSET_PADDING = 1.0
-MIN_LABEL_WIDTH = 80
-MIN_LABEL_HEIGHT = 38
+MIN_TILE_SIZE = 2.0  # Tiles narrower or shorter than this (in px) are not drawn
+MIN_TILE_AREA = 9.0  # Nor tiles covering fewer square pixels than this
+MAX_RECTS = 5000  # Only the largest tiles are drawn beyond this many
+# Cheap pre-filter for labels; candidates are then measured to see if they fit.
+MIN_LABEL_WIDTH = 24
+MIN_LABEL_HEIGHT = 24
+LABEL_PADDING = 4
 
 DIR_TILE_BASE = "#C48B4A"
 FILE_TILE_BASE = "#4D90D5"
@@ -42,6 +56,12 @@ SEARCH_LIGHTEN_FACTOR = 0.45
 DEPTH_SHADE_FACTOR = 0.06
 VISIBLE_DEPTH: Optional[int] = None  # Show entire hierarchy for richer treemap
 
+# Platform facts are fixed for the process; resolve them once instead of per click.
+_SYSTEM = platform.system()
+_IS_DARWIN = _SYSTEM == "Darwin"
+_IS_WINDOWS = _SYSTEM == "Windows"
+_HOME = Path.home()
+
 
 def check_directory_access(path: Path) -> tuple[bool, str]:
     """Check if a directory is accessible for scanning.
@@ -59,8 +79,9 @@ def check_directory_access(path: Path) -> tuple[bool, str]:
         return False, "Path is not a directory"
 
     try:
-        # Try to list directory contents
-        list(path.iterdir())
+        # Reading a single entry proves access without listing the whole directory
+        with os.scandir(path) as it:
+            next(it, None)
         return True, "Access OK"
     except PermissionError:
         return False, "Permission denied - cannot access this directory"
@@ -74,11 +95,8 @@ def get_safe_directories() -> List[tuple[str, Path]]:
     Returns:
         List of (description, path) tuples for accessible directories
     """
-    import platform
-    from pathlib import Path
-
     safe_dirs = []
-    home = Path.home()
+    home = _HOME
 
     # Common safe directories
     candidates = [
@@ -90,7 +108,7 @@ def get_safe_directories() -> List[tuple[str, Path]]:
     ]
 
     # Add macOS-specific safe locations
-    if platform.system() == "Darwin":
+    if _IS_DARWIN:
         candidates.extend([
             ("Applications", Path("/Applications")),
             ("Developer", home / "Developer"),
@@ -111,8 +129,35 @@ class _PendingScan:
     path: Path
     depth: int
     follow_symlinks: bool
+    from_monitor: bool = False
+    previous: Optional[DiskNode] = None  # Tree to reuse unchanged listings from
+
+
+def _snapshot_hash(node: DiskNode) -> bytes:
+    """Digest the (path, size, mtime) snapshot of a tree for change detection.
+
+    Records are streamed into blake2b in scan order, which is deterministic,
+    so nothing is materialized or sorted.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for item in node.iter_all():
+        digest.update(os.fsencode(item.path))
+        digest.update(item.size.to_bytes(8, "little"))
+        digest.update(item.modified_ns.to_bytes(8, "little", signed=True))
+    return digest.digest()
+
+
+@dataclass
+class _DrawnTile:
+    item: int
+    layout: NodeRect
+    index: int  # Position of layout in current_layout
+    rect: Rect
+    text_item: Optional[int]
+    shade_level: int
 
 
+@lru_cache(maxsize=4096)
 def format_size(num_bytes: int) -> str:
     """Format byte count as human-readable string.
 
@@ -130,36 +175,70 @@ def format_size(num_bytes: int) -> str:
     return f"{value:.1f} {units[magnitude]}"
 
 
-def lighten(color: str, factor: float = NORMAL_LIGHTEN_FACTOR) -> str:
-    """Lighten a hex color by blending it with white.
+def _parse_hex(color: str) -> int:
+    """Parse a "#RRGGBB" color string into a packed 0xRRGGBB integer."""
+    return int(color.lstrip("#"), 16)
 
-    Args:
-        color: Hex color string (e.g., "#FF0000")
-        factor: Blend factor between 0 (original) and 1 (white)
 
-    Returns:
-        Lightened hex color string
-    """
-    color = color.lstrip("#")
-    r = int(color[0:2], 16)
-    g = int(color[2:4], 16)
-    b = int(color[4:6], 16)
+def _fmt(rgb: int) -> str:
+    """Format a packed 0xRRGGBB integer as a Tk color string."""
+    return "#%06x" % rgb
+
+
+def _rgb_lighten(rgb: int, factor: float) -> int:
+    """Blend a packed RGB color with white."""
+    r = (rgb >> 16) & 0xFF
+    g = (rgb >> 8) & 0xFF
+    b = rgb & 0xFF
     r = int(r + (255 - r) * factor)
     g = int(g + (255 - g) * factor)
     b = int(b + (255 - b) * factor)
-    return f"#{r:02x}{g:02x}{b:02x}"
+    return (r << 16) | (g << 8) | b
+
+
+def _rgb_darken(rgb: int, factor: float) -> int:
+    """Blend a packed RGB color with black."""
+    r = int(((rgb >> 16) & 0xFF) * (1 - factor))
+    g = int(((rgb >> 8) & 0xFF) * (1 - factor))
+    b = int((rgb & 0xFF) * (1 - factor))
+    return (r << 16) | (g << 8) | b
 
 
-def darken(color: str, factor: float = 0.25) -> str:
-    """Darken a hex color by blending it with black."""
-    color = color.lstrip("#")
-    r = int(color[0:2], 16)
-    g = int(color[2:4], 16)
-    b = int(color[4:6], 16)
-    r = int(r * (1 - factor))
-    g = int(g * (1 - factor))
-    b = int(b * (1 - factor))
-    return f"#{r:02x}{g:02x}{b:02x}"
+DIR_TILE_BASE_RGB = _parse_hex(DIR_TILE_BASE)
+FILE_TILE_BASE_RGB = _parse_hex(FILE_TILE_BASE)
+
+
+@lru_cache(maxsize=64)
+def _tile_palette(
+    is_dir: bool,
+    shade_level: int,
+    search_match: bool,
+    query_active: bool,
+    selected: bool,
+) -> tuple[str, str]:
+    """Compute the (fill, outline) colors for one tile style.
+
+    There are only a few dozen distinct styles, so results are cached and the
+    redraw loop never touches color arithmetic per tile. Colors stay packed
+    integers until the final formatting for Tk.
+    """
+    base = DIR_TILE_BASE_RGB if is_dir else FILE_TILE_BASE_RGB
+    shade = shade_level * DEPTH_SHADE_FACTOR
+    fill_factor = max(0.05, NORMAL_LIGHTEN_FACTOR - shade)
+    fill = _rgb_lighten(base, fill_factor)
+    outline = _fmt(_rgb_darken(base, max(0.1, 0.4 - shade * 0.5)))
+
+    if query_active:
+        if search_match:
+            outline = SEARCH_MATCH_COLOR
+        else:
+            fill = _rgb_lighten(fill, SEARCH_LIGHTEN_FACTOR)
+            outline = DIMMED_OUTLINE_COLOR
+
+    if selected:
+        outline = SELECTION_COLOR
+        fill = _rgb_lighten(fill, 0.15)
+    return _fmt(fill), outline
 
 
 class DiskVizApp:
@@ -180,20 +259,64 @@ class DiskVizApp:
         self.current_node: Optional[DiskNode] = None
         self.root_node: Optional[DiskNode] = None  # Store original root for navigation
         self.current_layout: List[NodeRect] = []
-        self.canvas_rects: Dict[int, DiskNode] = {}
+        # Canvas items are recycled across redraws instead of delete("all") + recreate.
+        self._rect_items: List[int] = []
+        self._text_items: List[int] = []
+        self._text_labels: Dict[int, str] = {}
+        # Rect each pooled label is stacked directly above.
+        self._label_anchors: Dict[int, int] = {}
+        self._label_cache: Dict[DiskNode, str] = {}
+        self._label_extents: Dict[tuple[bool, str], tuple[int, int]] = {}
+        self._message_item: Optional[int] = None
+        self._layout_key: Optional[tuple] = None
+        self._search_index: Optional[TrigramIndex] = None
+        self._index_root: Optional[DiskNode] = None  # Tree an index is being built for
+        self._last_search: Optional[tuple[str, Set[DiskNode], Set[DiskNode]]] = None
+        self._drawn_tiles: List[_DrawnTile] = []
+        self._tile_styles: Dict[str, tuple[bool, int]] = {}
+        self._item_tags: Dict[int, str] = {}
+        # How many items at the front of each pool were left shown, by kind.
+        self._pool_shown: Dict[str, int] = {"tile": 0, "label": 0}
+        self._canvas_center: tuple[float, float] = (0.0, 0.0)
+        self._skipped_tiles = 0
+        # Hit-testing state for the drawn tiles, as parallel flat arrays indexed
+        # by tile position: inset bounds (x0, y0, x1, y1 per tile), visibility,
+        # and a uniform grid of tile positions.
+        self._tile_bounds = array("d")
+        self._tile_visible = bytearray()
+        self._hit_grid: List[List[int]] = []
+        self._hit_cell_size: tuple[float, float] = (1.0, 1.0)
+        self._hover_after_id: Optional[str] = None
+        self._hover_pos: tuple[int, int] = (0, 0)
+        self._last_hover_node: Optional[DiskNode] = None
+        self._search_after_id: Optional[str] = None
+        self._resize_after_id: Optional[str] = None
+        self._redraw_pending = False
         self.selection: Optional[DiskNode] = None
-        self.snapshot_hash: Optional[int] = None
+        self._parent_of: Dict[int, DiskNode] = {}
+        self.snapshot_hash: Optional[bytes] = None
+        # (path, depth, follow_symlinks) of the scan shown; the pending
+        # request itself is not kept, as it references the tree it reused.
+        self._last_scan: Optional[tuple[Path, int, bool]] = None
+
+        # Probing candidate folders touches the file system; do it once per session.
+        self._safe_dirs = get_safe_directories()
 
         self._setup_ui()
         self.monitor_job: Optional[str] = None
-        self.scan_queue: "queue.Queue[_PendingScan]" = queue.Queue()
+        # Only the latest scan request matters: a single slot, overwritten by
+        # newer requests, is handed to the worker through an Event.
+        self._next_scan: Optional[_PendingScan] = None
+        self._scan_lock = threading.Lock()
+        self._scan_event = threading.Event()
+        self._scan_stopped = False
         self.scan_thread: threading.Thread = threading.Thread(target=self._scan_worker, daemon=True)
         self.scan_thread.start()
-        self.is_drawing: bool = False
         self.is_fullscreen: bool = False
 
-        self.search_var.trace_add("write", lambda *_: self.redraw())
+        self.search_var.trace_add("write", lambda *_: self._schedule_search_restyle())
         self._setup_keyboard_shortcuts()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
     # ------------------------------------------------------------------ UI
     def _setup_ui(self) -> None:
@@ -239,7 +362,7 @@ class DiskVizApp:
             top_frame,
             text="Hide non-matching",
             variable=self.filter_var,
-            command=self.redraw,
+            command=self._restyle,
         ).grid(row=1, column=2, sticky="w", padx=(0, 4), pady=(6, 0))
 
         # Navigation and action buttons
@@ -253,9 +376,18 @@ class DiskVizApp:
 
         top_frame.columnconfigure(1, weight=1)
 
+        # Font objects are resolved once and shared by every canvas label; they
+        # also measure which labels fit inside their tile.
+        self._label_fonts = {
+            False: tkfont.Font(root=self.root, family="Segoe UI", size=9),
+            True: tkfont.Font(root=self.root, family="Segoe UI", size=9, weight="bold"),
+        }
+        self._label_linespace = {bold: font.metrics("linespace") for bold, font in self._label_fonts.items()}
+        self._message_font = tkfont.Font(root=self.root, family="Segoe UI", size=12, weight="bold")
+
         self.canvas = tk.Canvas(self.root, background=CANVAS_BG_COLOR, highlightthickness=0, bd=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
-        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Configure>", lambda event: self._schedule_resize_redraw())
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.bind("<Double-Button-1>", self.on_canvas_double_click)
         self.canvas.bind("<Motion>", self.on_canvas_motion)
@@ -291,9 +423,8 @@ class DiskVizApp:
         quick_btn["menu"] = menu
 
         # Add safe directories to menu
-        safe_dirs = get_safe_directories()
-        if safe_dirs:
-            for desc, path in safe_dirs:
+        if self._safe_dirs:
+            for desc, path in self._safe_dirs:
                 menu.add_command(
                     label=f"{desc}: {path}",
                     command=lambda p=path: self._select_safe_directory(p)
@@ -312,9 +443,7 @@ class DiskVizApp:
 
     def _show_permission_help(self) -> None:
         """Show help about macOS permissions."""
-        import platform
-
-        if platform.system() == "Darwin":
+        if _IS_DARWIN:
             message = """macOS Permission Guide
 
 Some folders require special permissions:
@@ -356,7 +485,7 @@ select a different folder."""
         # Escape - Clear selection or exit fullscreen
         self.root.bind("<Escape>", lambda e: self._handle_escape())
         # Ctrl+Q - Quit
-        self.root.bind("<Control-q>", lambda e: self.root.quit())
+        self.root.bind("<Control-q>", lambda e: self._on_close())
 
     def toggle_fullscreen(self) -> None:
         """Toggle fullscreen mode."""
@@ -409,14 +538,17 @@ select a different folder."""
             self.info_size_label.configure(text="")
             return
         self.info_path_label.configure(text=str(target.path))
-        self.info_size_label.configure(text=f"Total {format_size(target.size)}")
+        size_text = f"Total {format_size(target.size)}"
+        if self._skipped_tiles:
+            size_text += f" · {self._skipped_tiles} items too small to draw"
+        self.info_size_label.configure(text=size_text)
 
     def _clear_selection(self) -> None:
         """Clear the current selection."""
         if self.selection:
             self.selection = None
             self.tooltip_var.set("")
-            self.redraw()
+            self._restyle()
 
     def _show_permission_warning(self, stats: ScanStats) -> None:
         """Show a warning dialog about permission-denied folders.
@@ -424,8 +556,6 @@ select a different folder."""
         Args:
             stats: Scan statistics containing denied paths
         """
-        import platform
-
         denied_count = len(stats.permission_denied)
         sample_paths = stats.permission_denied[:5]  # Show first 5
 
@@ -441,7 +571,7 @@ select a different folder."""
                 message_parts.append(f"  ... and {denied_count - 5} more")
 
         # Add macOS-specific guidance
-        if platform.system() == "Darwin":
+        if _IS_DARWIN:
             message_parts.extend([
                 "\n\nOn macOS, you may need to grant Full Disk Access:",
                 "1. Open System Settings → Privacy & Security",
@@ -460,15 +590,12 @@ select a different folder."""
     # ------------------------------------------------------------------ directory selection
     def choose_directory(self) -> None:
         """Open a file dialog to select a directory to visualize."""
-        import platform
-
         # Set initial directory to a safe location
         initial_dir = None
-        if platform.system() == "Darwin":
+        if _IS_DARWIN:
             # Try to start in a safe location on macOS
-            safe_dirs = get_safe_directories()
-            if safe_dirs:
-                initial_dir = str(safe_dirs[0][1])
+            if self._safe_dirs:
+                initial_dir = str(self._safe_dirs[0][1])
 
         path = filedialog.askdirectory(
             title="Select directory to visualize",
@@ -496,10 +623,9 @@ select a different folder."""
             self.status_var.set(f"❌ {message}: {path}")
 
             # Show helpful error dialog
-            import platform
             error_msg = f"Cannot access directory:\n{path}\n\n{message}"
 
-            if platform.system() == "Darwin" and "Permission denied" in message:
+            if _IS_DARWIN and "Permission denied" in message:
                 error_msg += "\n\n💡 Tip: Use the 'Quick Access' menu to select\naccessible directories, or grant Full Disk Access\nin System Settings → Privacy & Security."
 
             result = messagebox.askyesno(
@@ -511,28 +637,110 @@ select a different folder."""
                 self._show_permission_help()
             return
 
-        self._clear_pending_scans()
         pending = _PendingScan(path=path, depth=int(self.depth_var.get()), follow_symlinks=self.follow_symlinks.get())
-        self.scan_queue.put(pending)
+        # An explicit scan always lists every directory afresh.
+        self._request_scan(pending)
         self.status_var.set(f"🔍 Scanning {path} ...")
 
     def _scan_worker(self) -> None:
         """Background thread worker that processes scan requests."""
         while True:
-            pending = self.scan_queue.get()
+            self._scan_event.wait()
+            with self._scan_lock:
+                pending = self._next_scan
+                self._next_scan = None
+                self._scan_event.clear()
+                if self._scan_stopped:
+                    break
             if pending is None:
+                continue
+            if not self._run_scan(pending):
                 break
-            try:
+
+    def _run_scan(self, pending: _PendingScan) -> bool:
+        """Run one scan on the worker thread and post its result to the UI.
+
+        Kept out of the worker loop so the scanned trees are not held by its
+        locals while it waits for the next request.
+
+        Returns:
+            False once the UI is gone and the worker should stop
+        """
+        previous = pending.previous
+        # The request is passed on to the UI; it must not pin the old tree.
+        pending.previous = None
+        try:
+            if previous is not None:
+                node, stats = rescan_directory(
+                    pending.path,
+                    previous,
+                    max_depth=pending.depth,
+                    follow_symlinks=pending.follow_symlinks,
+                )
+            else:
                 node, stats = scan_directory(pending.path, max_depth=pending.depth, follow_symlinks=pending.follow_symlinks)
-            except Exception as exc:  # pragma: no cover - defensive
-                self.root.after(0, lambda e=exc: self.status_var.set(f"Scan failed: {e}"))
-                continue
-            self.root.after(0, lambda n=node, p=pending, s=stats: self._apply_scan(n, p, s))
+        except Exception as exc:  # pragma: no cover - defensive
+            self._post_to_ui(lambda e=exc: self.status_var.set(f"Scan failed: {e}"))
+            return True
+        # Hash and index in this thread so the Tk main loop only has to swap
+        # in the result.
+        snapshot_hash = _snapshot_hash(node)
+        if pending.from_monitor and snapshot_hash == self.snapshot_hash:
+            # Unchanged on disk; no need to wake the UI at all.
+            return True
+        parent_of = self._build_parent_map(node)
+        return self._post_to_ui(
+            lambda n=node, p=pending, s=stats, h=snapshot_hash, m=parent_of: self._apply_scan(n, p, s, h, m),
+        )
+
+    def _request_scan(self, pending: _PendingScan, replace: bool = True) -> bool:
+        """Hand a scan request to the worker thread.
+
+        Args:
+            pending: Scan to run
+            replace: Whether to overwrite a request the worker has not taken yet
+
+        Returns:
+            False if another request was already waiting and replace is False
+        """
+        with self._scan_lock:
+            if not replace and self._next_scan is not None:
+                return False
+            self._next_scan = pending
+            self._scan_event.set()
+        return True
+
+    def _post_to_ui(self, callback: Callable[[], None]) -> bool:
+        """Hand a callback to the Tk main loop; returns False once the window is gone."""
+        try:
+            self.root.after(0, callback)
+        except (RuntimeError, tk.TclError):
+            return False
+        return True
 
-    def _apply_scan(self, node: DiskNode, pending: _PendingScan, stats: ScanStats) -> None:
+    def _apply_scan(
+        self,
+        node: DiskNode,
+        pending: _PendingScan,
+        stats: ScanStats,
+        snapshot_hash: bytes,
+        parent_of: Dict[int, DiskNode],
+    ) -> None:
         """Apply scan results to the UI and update the display."""
+        if pending.from_monitor and snapshot_hash == self.snapshot_hash:
+            # Nothing changed on disk; keep the current view, selection and caches.
+            return
+        self._last_scan = (pending.path, pending.depth, pending.follow_symlinks)
         self.current_node = node
         self.root_node = node  # Store the scan root
+        self._parent_of = parent_of
+        self._label_cache.clear()
+        self._label_extents.clear()
+        self._layout_key = None
+        clear_layout_cache()
+        self._search_index = None
+        self._index_root = None
+        self._last_search = None
         self.selection = None
 
         # Build status message
@@ -553,130 +761,348 @@ select a different folder."""
         if len(stats.permission_denied) >= 3:
             self._show_permission_warning(stats)
 
-        snapshot = tuple(sorted((str(path), size, mtime) for path, size, mtime in flatten_snapshot(node)))
-        self.snapshot_hash = hash(snapshot)
-        self.redraw()
+        self.snapshot_hash = snapshot_hash
+        self._request_redraw()
         self._schedule_monitor()
 
+    @staticmethod
+    def _build_parent_map(root: DiskNode) -> Dict[int, DiskNode]:
+        """Map id(child) to its parent for every node in the tree."""
+        parent_of: Dict[int, DiskNode] = {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                parent_of[id(child)] = node
+                if child.is_dir:
+                    stack.append(child)
+        return parent_of
+
     # ------------------------------------------------------------------ drawing
     def _truncate_label(self, text: str, max_length: int = 28) -> str:
         """Truncate long labels so they fit better inside rectangles."""
         return text if len(text) <= max_length else text[: max_length - 1] + "…"
 
     def _format_node_label(self, node: DiskNode) -> str:
-        """Build the multi-line label displayed inside each rectangle."""
+        """Build the multi-line label displayed inside each rectangle.
+
+        Labels only depend on the node, so they are cached until the next scan.
+        """
+        label = self._label_cache.get(node)
+        if label is not None:
+            return label
         name = self._truncate_label(node.name or str(node.path))
         size_text = format_size(node.size)
         if node.is_dir:
             display_name = f"{name or '/'}"
-            return f"{display_name}/\n{size_text}"
-        parent = node.path.parent
-        parent_name = parent.name or str(parent)
-        parent_display = self._truncate_label(parent_name or "/")
-        return f"{name}\n[{parent_display}]\n{size_text}"
-
-    def _tile_colors(
-        self,
-        node: DiskNode,
-        depth: int,
-        search_match: bool,
-        query_active: bool,
-    ) -> tuple[str, str]:
-        base = DIR_TILE_BASE if node.is_dir else FILE_TILE_BASE
-        shade = min(max(depth - 1, 0), 3) * DEPTH_SHADE_FACTOR
-        fill_factor = max(0.05, NORMAL_LIGHTEN_FACTOR - shade)
-        fill = lighten(base, fill_factor)
-        outline = darken(base, max(0.1, 0.4 - shade * 0.5))
-
-        if query_active:
-            if search_match:
-                outline = SEARCH_MATCH_COLOR
-            else:
-                fill = lighten(fill, SEARCH_LIGHTEN_FACTOR)
-                outline = DIMMED_OUTLINE_COLOR
-
-        if node == self.selection:
-            outline = SELECTION_COLOR
-            fill = lighten(fill, 0.15)
-        return fill, outline
-
+            label = f"{display_name}/\n{size_text}"
+        else:
+            parent = node.path.parent
+            parent_name = parent.name or str(parent)
+            parent_display = self._truncate_label(parent_name or "/")
+            label = f"{name}\n[{parent_display}]\n{size_text}"
+        self._label_cache[node] = label
+        return label
+
+    def _label_fits(self, label: str, bold: bool, rect: Rect) -> bool:
+        """Check whether a label fits inside a tile using cached font metrics."""
+        key = (bold, label)
+        extent = self._label_extents.get(key)
+        if extent is None:
+            font = self._label_fonts[bold]
+            lines = label.split("\n")
+            width = max(font.measure(line) for line in lines)
+            extent = (width, len(lines) * self._label_linespace[bold])
+            self._label_extents[key] = extent
+        return extent[0] <= rect.width - LABEL_PADDING and extent[1] <= rect.height - LABEL_PADDING
+
+    def _request_redraw(self) -> None:
+        """Schedule a redraw for when Tk is idle, coalescing repeated requests."""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.root.after_idle(self._do_redraw)
+
+    def _do_redraw(self) -> None:
+        self._redraw_pending = False
+        self.redraw()
 
     def redraw(self) -> None:
         """Redraw the treemap visualization on the canvas."""
-        if self.current_node is None or self.is_drawing:
+        if self.current_node is None:
             return
-        self.is_drawing = True
-        try:
-            width = max(self.canvas.winfo_width(), 100)
-            height = max(self.canvas.winfo_height(), 100)
-            self.canvas.delete("all")
-            self.canvas.delete("all")
-            self.canvas_rects.clear()
-            self.current_layout = slice_and_dice(
-                self.current_node,
-                Rect(0, 0, width, height),
-                max_depth=VISIBLE_DEPTH,
+        width = max(self.canvas.winfo_width(), 100)
+        height = max(self.canvas.winfo_height(), 100)
+        # <Configure> also fires without a size change; keep the layout then.
+        layout_key = (self.current_node, width, height, VISIBLE_DEPTH)
+        if layout_key != self._layout_key:
+            self._relayout(width, height)
+            self._layout_key = layout_key
+        self._restyle()
+
+    def _relayout(self, width: int, height: int) -> None:
+        """Recompute the treemap geometry and position the pooled canvas items.
+
+        Only needed when the viewed node or the canvas size changes; search and
+        selection changes go through _restyle() alone.
+        """
+        self.current_layout = cached_slice_and_dice(
+            self.current_node,
+            Rect(0, 0, width, height),
+            max_depth=VISIBLE_DEPTH,
+            min_size=MIN_TILE_SIZE,
+            min_area=MIN_TILE_AREA,
+        )
+
+        tiles: List[_DrawnTile] = []
+        tile_bounds = array("d")
+        styles: Dict[str, tuple[bool, int]] = {}
+        text_count = 0
+        # Nodes culled inside the layout count as too small too, not only the
+        # laid-out entries rejected below.
+        skipped = count_unlaid(self.current_layout, VISIBLE_DEPTH)
+        coords = self.canvas.coords
+        padding = RECT_INSET_PADDING
+        min_size = MIN_TILE_SIZE + 2 * padding
+        layouts = self.current_layout
+        # Reject slivers on the raw geometry before allocating inset Rects.
+        candidates: List[int] = []
+        for index, layout in enumerate(layouts):
+            if layout.depth == 0:
+                continue
+            bounds = layout.rect
+            if (
+                bounds.width < min_size
+                or bounds.height < min_size
+                or (bounds.width - 2 * padding) * (bounds.height - 2 * padding) < MIN_TILE_AREA
+            ):
+                skipped += 1
+                continue
+            candidates.append(index)
+        if len(candidates) > MAX_RECTS:
+            # Keep the largest tiles, still drawn in layout (parent-first) order.
+            keep = heapq.nlargest(MAX_RECTS, candidates, key=lambda i: layouts[i].rect.width * layouts[i].rect.height)
+            skipped += len(candidates) - MAX_RECTS
+            candidates = sorted(keep)
+
+        for index in candidates:
+            layout = layouts[index]
+            bounds = layout.rect
+            node = layout.node
+            rect = Rect(
+                bounds.x + padding,
+                bounds.y + padding,
+                bounds.width - 2 * padding,
+                bounds.height - 2 * padding,
             )
-            query = self.search_var.get().lower().strip()
-            matching_nodes = set()
-            if query:
-                filtered_layouts = list(filter_layout(self.current_layout, query))
-                matching_nodes = {layout.node for layout in filtered_layouts}
-
-            drawn = False
-            for layout in self.current_layout:
-                if layout.depth == 0:
-                    continue
-                node = layout.node
-                rect = layout.rect.inset(RECT_INSET_PADDING)
-                if rect.width <= 0 or rect.height <= 0:
-                    continue
-                is_match = query and node in matching_nodes
-                hide_non_match = self.filter_var.get()
-                if query and hide_non_match and not is_match:
-                    continue
-                fill_color, outline = self._tile_colors(node, layout.depth, bool(is_match), bool(query))
-                item = self.canvas.create_rectangle(
-                    rect.x,
-                    rect.y,
-                    rect.x + rect.width,
-                    rect.y + rect.height,
-                    fill=fill_color,
-                    outline=outline,
-                    width=1.2,
-                )
-                self.canvas_rects[item] = node
-                drawn = True
-                if rect.width > MIN_LABEL_WIDTH and rect.height > MIN_LABEL_HEIGHT:
-                    label = self._format_node_label(node)
+            item = self._pooled_item(self._rect_items, len(tiles), "tile")
+            coords(item, rect.x, rect.y, rect.x + rect.width, rect.y + rect.height)
+            shade_level = min(max(layout.depth - 1, 0), 3)
+            style_tag = f"style{int(node.is_dir)}{shade_level}"
+            styles[style_tag] = (node.is_dir, shade_level)
+            self._set_item_tag(item, "tile", style_tag)
+            text_item = None
+            label = None
+            if rect.width > MIN_LABEL_WIDTH and rect.height > MIN_LABEL_HEIGHT:
+                label = self._format_node_label(node)
+                if not self._label_fits(label, node.is_dir, rect):
+                    label = None
+            if label is not None:
+                text_item = self._pooled_item(self._text_items, text_count, "label")
+                text_count += 1
+                coords(text_item, rect.x + rect.width / 2, rect.y + rect.height / 2)
+                if self._text_labels.get(text_item) != label:
                     # Use bold font for directories
-                    font_spec = ("Segoe UI", 9, "bold") if node.is_dir else ("Segoe UI", 9)
-                    self.canvas.create_text(
-                        rect.x + rect.width / 2,
-                        rect.y + rect.height / 2,
-                        text=label,
-                        fill=TEXT_COLOR,
-                        font=font_spec,
-                        justify=tk.CENTER,
-                    )
-            if query and self.filter_var.get() and not drawn:
-                self.canvas.create_text(
-                    width / 2,
-                    height / 2,
-                    text=f"No results for '{self.search_var.get().strip()}'",
-                    fill=TEXT_COLOR,
-                    font=("Segoe UI", 12, "bold"),
-                )
-            elif not drawn:
-                self.canvas.create_text(
-                    width / 2,
-                    height / 2,
-                    text="This folder is empty.",
-                    fill="#a8b0c0",
-                    font=("Segoe UI", 12, "bold"),
-                )
-        finally:
-            self.is_drawing = False
+                    self.canvas.itemconfigure(text_item, text=label, font=self._label_fonts[node.is_dir])
+                    self._text_labels[text_item] = label
+                if self._label_anchors.get(text_item) != item:
+                    # Stack the label just above its own rect, so later
+                    # (child) tiles still cover it as they did before pooling.
+                    self.canvas.tag_raise(text_item, item)
+                    self._label_anchors[text_item] = item
+                self._set_item_tag(text_item, "label", "label_on")
+            tiles.append(_DrawnTile(item, layout, index, rect, text_item, shade_level))
+            tile_bounds.extend((rect.x, rect.y, rect.x + rect.width, rect.y + rect.height))
+
+        self._hide_surplus(self._rect_items, len(tiles), "tile")
+        self._hide_surplus(self._text_items, text_count, "label")
+        self._drawn_tiles = tiles
+        self._tile_bounds = tile_bounds
+        self._tile_visible = bytearray(b"\x01") * len(tiles)
+        self._tile_styles = styles
+        self._canvas_center = (width / 2, height / 2)
+        self._build_hit_grid(width, height)
+        self._last_hover_node = None
+        self._skipped_tiles = skipped
+        self._update_info_bar(self.current_node)
+
+    def _restyle(self) -> None:
+        """Apply search, filter and selection styling to the laid-out tiles."""
+        if self.current_node is None:
+            return
+        query = self.search_var.get().lower().strip()
+        hide_non_match = bool(query) and self.filter_var.get()
+        mask = bytearray()
+        if query:
+            matches, ancestors = self._search_matches(query)
+            mask = match_mask(self.current_layout, query, matches, ancestors)
+
+        # Style whole groups through their canvas tags (one Tcl call per group),
+        # then override the few tiles that match the search or are selected.
+        for style_tag, (is_dir, shade_level) in self._tile_styles.items():
+            if hide_non_match:
+                self.canvas.itemconfigure(style_tag, state=tk.HIDDEN)
+            else:
+                fill_color, outline = _tile_palette(is_dir, shade_level, False, bool(query), False)
+                self.canvas.itemconfigure(style_tag, fill=fill_color, outline=outline, state=tk.NORMAL)
+        self.canvas.itemconfigure("label_on", state=tk.HIDDEN if hide_non_match else tk.NORMAL)
+
+        drawn = False
+        visible = self._tile_visible
+        for position, tile in enumerate(self._drawn_tiles):
+            node = tile.layout.node
+            is_match = bool(query) and mask[tile.index] == 1
+            shown = not hide_non_match or is_match
+            visible[position] = shown
+            if not shown:
+                continue
+            drawn = True
+            if not is_match and node is not self.selection:
+                continue
+            fill_color, outline = _tile_palette(
+                node.is_dir, tile.shade_level, is_match, bool(query), node is self.selection
+            )
+            self.canvas.itemconfigure(tile.item, fill=fill_color, outline=outline, state=tk.NORMAL)
+            if hide_non_match and tile.text_item is not None:
+                self.canvas.itemconfigure(tile.text_item, state=tk.NORMAL)
+
+        if hide_non_match and not drawn:
+            self._show_message(f"No results for '{self.search_var.get().strip()}'", TEXT_COLOR)
+        elif not drawn:
+            self._show_message("This folder is empty.", "#a8b0c0")
+        elif self._message_item is not None:
+            self.canvas.itemconfigure(self._message_item, state=tk.HIDDEN)
+
+    def _search_matches(self, query: str) -> tuple[Set[DiskNode], Set[DiskNode]]:
+        """Return the nodes whose path contains query, and all their ancestors.
+
+        Both are taken from the whole scanned tree: a match too small to be
+        laid out still keeps the tiles that contain it. Until the trigram
+        index for this tree is ready, paths are checked one by one. The last
+        result is kept so toggling the filter does not search again.
+        """
+        if self._last_search is not None and self._last_search[0] == query:
+            return self._last_search[1], self._last_search[2]
+        root = self.root_node or self.current_node
+        if self._search_index is not None:
+            matches = self._search_index.search(query)
+        else:
+            self._build_search_index(root)
+            matches = {node for node in root.iter_all() if query in node.path_lower}
+        parent_of = self._parent_of
+        ancestors: Set[DiskNode] = set()
+        for node in matches:
+            parent = parent_of.get(id(node))
+            # Stop at a parent already added; its own chain is in the set.
+            while parent is not None and parent not in ancestors:
+                ancestors.add(parent)
+                parent = parent_of.get(id(parent))
+        self._last_search = (query, matches, ancestors)
+        return matches, ancestors
+
+    def _build_search_index(self, root: DiskNode) -> None:
+        """Index root off the Tk thread, once a search shows it is needed.
+
+        Monitor rescans nobody searches are never indexed. The index is only
+        installed if root is still the scanned tree when it is done.
+        """
+        if self._index_root is root:
+            return
+        self._index_root = root
+
+        def build() -> None:
+            index = TrigramIndex(root)
+            self._post_to_ui(lambda: self._set_search_index(root, index))
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def _set_search_index(self, root: DiskNode, index: TrigramIndex) -> None:
+        if root is self._index_root:
+            self._search_index = index
+
+    def _show_message(self, text: str, color: str) -> None:
+        """Show the centered canvas message, reusing a single text item."""
+        center_x, center_y = self._canvas_center
+        if self._message_item is None:
+            self._message_item = self.canvas.create_text(
+                center_x,
+                center_y,
+                font=self._message_font,
+                tags=("message",),
+            )
+        else:
+            self.canvas.coords(self._message_item, center_x, center_y)
+        self.canvas.itemconfigure(self._message_item, text=text, fill=color, state=tk.NORMAL)
+        self.canvas.tag_raise(self._message_item)
+
+    def _schedule_search_restyle(self) -> None:
+        """Coalesce bursts of search edits into a single restyle."""
+        if self._search_after_id:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self._do_search_restyle)
+
+    def _do_search_restyle(self) -> None:
+        self._search_after_id = None
+        self._restyle()
+
+    def _schedule_resize_redraw(self) -> None:
+        """Coalesce the <Configure> events fired while resizing into one redraw."""
+        if self._resize_after_id:
+            self.root.after_cancel(self._resize_after_id)
+        self._resize_after_id = self.root.after(RESIZE_DEBOUNCE_MS, self._do_resize_redraw)
+
+    def _do_resize_redraw(self) -> None:
+        self._resize_after_id = None
+        self._request_redraw()
+
+    def _pooled_item(self, pool: List[int], index: int, kind: str) -> int:
+        """Return the pooled canvas item at index, creating it on first use.
+
+        Args:
+            pool: Item pool to draw from (rectangles or labels)
+            index: Position in the pool
+            kind: Canvas tag, either "tile" or "label"
+
+        Returns:
+            Canvas item id
+        """
+        if index < len(pool):
+            return pool[index]
+        if kind == "tile":
+            item = self.canvas.create_rectangle(0, 0, 0, 0, width=1.2, tags=(kind,))
+        else:
+            item = self.canvas.create_text(0, 0, fill=TEXT_COLOR, justify=tk.CENTER, tags=(kind,))
+        pool.append(item)
+        return item
+
+    def _hide_surplus(self, pool: List[int], used: int, kind: str) -> None:
+        """Hide pooled items that were not needed by the current redraw.
+
+        Their group tag is dropped as well so tag-wide restyles leave them hidden.
+        Items already hidden by an earlier redraw are not touched again.
+        """
+        shown = self._pool_shown[kind]
+        self._pool_shown[kind] = used
+        for item in pool[used:shown]:
+            if self._item_tags.pop(item, None) is not None:
+                self.canvas.itemconfigure(item, state=tk.HIDDEN, tags=(kind,))
+            else:
+                self.canvas.itemconfigure(item, state=tk.HIDDEN)
+
+    def _set_item_tag(self, item: int, kind: str, group_tag: str) -> None:
+        """Put a pooled item into a styling group, skipping the call if unchanged."""
+        if self._item_tags.get(item) != group_tag:
+            self.canvas.itemconfigure(item, tags=(kind, group_tag))
+            self._item_tags[item] = group_tag
 
     # ------------------------------------------------------------------ mouse interaction
     def on_canvas_click(self, event: tk.Event) -> None:
@@ -691,11 +1117,24 @@ select a different folder."""
             return
         self.selection = node
         self.tooltip_var.set(f"Selected: {node.path} ({format_size(node.size)})")
-        self.redraw()
+        self._restyle()
 
     def on_canvas_motion(self, event: tk.Event) -> None:
-        """Handle mouse motion to show tooltip information."""
-        node = self._node_at(event.x, event.y)
+        """Handle mouse motion to show tooltip information.
+
+        Motion events are throttled to one tooltip refresh per HOVER_THROTTLE_MS.
+        """
+        self._hover_pos = (event.x, event.y)
+        if self._hover_after_id is None:
+            self._hover_after_id = self.root.after(HOVER_THROTTLE_MS, self._update_hover)
+
+    def _update_hover(self) -> None:
+        """Refresh the tooltip for the node under the last seen cursor position."""
+        self._hover_after_id = None
+        node = self._node_at(*self._hover_pos)
+        if node is self._last_hover_node:
+            return
+        self._last_hover_node = node
         if node:
             self.tooltip_var.set(f"{node.path} — {format_size(node.size)}")
         else:
@@ -711,7 +1150,7 @@ select a different folder."""
             self.selection = None
             self.status_var.set(f"Viewing {node.path} — {format_size(node.size)}")
             self._update_info_bar(node)
-            self.redraw()
+            self._request_redraw()
         else:
             self._open_file(node.path)
 
@@ -723,7 +1162,7 @@ select a different folder."""
         self.selection = node
         self.tooltip_var.set(f"Selected: {node.path} ({format_size(node.size)})")
         # Avoid triggering animation for context menu redraws
-        self.redraw()
+        self._restyle()
         self._show_context_menu(event, node)
 
     def _node_at(self, x: int, y: int) -> Optional[DiskNode]:
@@ -736,13 +1175,46 @@ select a different folder."""
         Returns:
             DiskNode at the coordinates, or None if no node is found
         """
-        overlapping = self.canvas.find_overlapping(x, y, x, y)
-        for item in reversed(overlapping):
-            node = self.canvas_rects.get(item)
-            if node:
-                return node
+        if not self._hit_grid:
+            return None
+        cell_w, cell_h = self._hit_cell_size
+        col = int(x // cell_w)
+        row = int(y // cell_h)
+        if not (0 <= col < HIT_GRID_CELLS and 0 <= row < HIT_GRID_CELLS):
+            return None
+        bounds = self._tile_bounds
+        visible = self._tile_visible
+        # Later tiles are drawn on top, so scan the bucket back to front.
+        for position in reversed(self._hit_grid[row * HIT_GRID_CELLS + col]):
+            base = position * 4
+            if visible[position] and bounds[base] <= x <= bounds[base + 2] and bounds[base + 1] <= y <= bounds[base + 3]:
+                return self._drawn_tiles[position].layout.node
         return None
 
+    def _build_hit_grid(self, width: float, height: float) -> None:
+        """Bucket the drawn tiles into a uniform grid for hit testing.
+
+        Mouse handlers look up the cell under the cursor instead of asking Tk
+        for overlapping items on every motion event.
+        """
+        cell_w = width / HIT_GRID_CELLS
+        cell_h = height / HIT_GRID_CELLS
+        grid: List[List[int]] = [[] for _ in range(HIT_GRID_CELLS * HIT_GRID_CELLS)]
+        last = HIT_GRID_CELLS - 1
+        bounds = self._tile_bounds
+        for position in range(len(self._drawn_tiles)):
+            x0, y0, x1, y1 = bounds[position * 4:position * 4 + 4]
+            col_start = min(int(x0 // cell_w), last)
+            col_end = min(int(x1 // cell_w), last)
+            row_start = min(int(y0 // cell_h), last)
+            row_end = min(int(y1 // cell_h), last)
+            for row in range(row_start, row_end + 1):
+                base = row * HIT_GRID_CELLS
+                for col in range(col_start, col_end + 1):
+                    grid[base + col].append(position)
+        self._hit_grid = grid
+        self._hit_cell_size = (cell_w, cell_h)
+
     def _show_context_menu(self, event: tk.Event, node: DiskNode) -> None:
         """Build and show the context menu for files/folders."""
         self.context_menu.delete(0, tk.END)
@@ -760,16 +1232,13 @@ select a different folder."""
 
     def _open_path(self, path: Path) -> None:
         """Open a path using the system default handler."""
-        import platform
-
         if not path.exists():
             messagebox.showerror("DiskViz", f"Path does not exist: {path}")
             return
         try:
-            system = platform.system()
-            if system == "Darwin":
+            if _IS_DARWIN:
                 subprocess.run(["open", str(path)], check=False)
-            elif system == "Windows":
+            elif _IS_WINDOWS:
                 os.startfile(str(path))  # type: ignore[attr-defined]
             else:
                 subprocess.run(["xdg-open", str(path)], check=False)
@@ -778,16 +1247,13 @@ select a different folder."""
 
     def _open_file(self, path: Path) -> None:
         """Open a file with the default application."""
-        import platform
-
         if not path.exists():
             messagebox.showerror("DiskViz", f"Path does not exist: {path}")
             return
         try:
-            system = platform.system()
-            if system == "Darwin":
+            if _IS_DARWIN:
                 subprocess.run(["open", str(path)], check=False)
-            elif system == "Windows":
+            elif _IS_WINDOWS:
                 os.startfile(str(path))  # type: ignore[attr-defined]
             else:
                 subprocess.run(["xdg-open", str(path)], check=False)
@@ -796,9 +1262,7 @@ select a different folder."""
 
     def _reveal_in_finder(self, path: Path) -> None:
         """Reveal the file in Finder (macOS only)."""
-        import platform
-
-        if platform.system() != "Darwin":
+        if not _IS_DARWIN:
             messagebox.showinfo("DiskViz", "Finder integration is only available on macOS.")
             return
         if not path.exists():
@@ -848,12 +1312,12 @@ select a different folder."""
             self.schedule_scan()
         else:
             # Navigate up within the tree
-            parent = self._find_parent(self.root_node, self.current_node)
+            parent = self._parent_of.get(id(self.current_node))
             if parent:
                 self.current_node = parent
                 self.status_var.set(f"Viewing {parent.path} — {format_size(parent.size)}")
                 self._update_info_bar(parent)
-                self.redraw()
+                self._request_redraw()
             else:
                 # Fallback to root
                 self.reset_view()
@@ -865,26 +1329,7 @@ select a different folder."""
             self.selection = None
             self.status_var.set(f"Viewing {self.root_node.path} — {format_size(self.root_node.size)}")
             self._update_info_bar(self.root_node)
-            self.redraw()
-
-    def _find_parent(self, root: DiskNode, target: DiskNode) -> Optional[DiskNode]:
-        """Find the parent node of target within the tree rooted at root.
-
-        Args:
-            root: Root of the tree to search
-            target: Node to find parent of
-
-        Returns:
-            Parent DiskNode, or None if not found
-        """
-        if target in root.children:
-            return root
-        for child in root.children:
-            if child.is_dir:
-                parent = self._find_parent(child, target)
-                if parent:
-                    return parent
-        return None
+            self._request_redraw()
 
     # ------------------------------------------------------------------ monitoring
     def _schedule_monitor(self) -> None:
@@ -901,20 +1346,37 @@ select a different folder."""
         path_value = self.path_var.get().strip()
         if not path_value:
             return
-        if self.scan_queue.qsize() > MAX_SCAN_QUEUE_SIZE:
-            self._schedule_monitor()
-            return
-        pending = _PendingScan(Path(path_value), int(self.depth_var.get()), self.follow_symlinks.get())
-        self.scan_queue.put(pending)
+        pending = _PendingScan(
+            Path(path_value).expanduser(), int(self.depth_var.get()), self.follow_symlinks.get(), from_monitor=True
+        )
+        self._reuse_last_scan(pending)
+        # A scan is already waiting (e.g. one the user asked for); skip this tick.
+        self._request_scan(pending, replace=False)
         self._schedule_monitor()
 
-    def _clear_pending_scans(self) -> None:
-        """Clear all pending scan requests from the queue."""
-        try:
-            while True:
-                self.scan_queue.get_nowait()
-        except queue.Empty:
-            return
+    def _reuse_last_scan(self, pending: _PendingScan) -> None:
+        """Let pending reuse the current tree if it repeats the last scan.
+
+        With the same path and settings, only directories whose mtime changed
+        since then are listed again.
+        """
+        if self.root_node is not None and self._last_scan == (
+            pending.path,
+            pending.depth,
+            pending.follow_symlinks,
+        ):
+            pending.previous = self.root_node
+
+    def _on_close(self) -> None:
+        """Stop the monitor and scan worker, then close the window."""
+        if self.monitor_job:
+            self.root.after_cancel(self.monitor_job)
+            self.monitor_job = None
+        with self._scan_lock:
+            self._next_scan = None
+            self._scan_stopped = True
+            self._scan_event.set()
+        self.root.destroy()
 
     # ------------------------------------------------------------------ run helper
 
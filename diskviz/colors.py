@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, Final
+from typing import Dict, Final, FrozenSet
 
 
 # Color palette for different file types
@@ -20,13 +20,24 @@ FILE_TYPE_COLORS: Final[Dict[str, str]] = {
 }
 
 # File extension sets for classification
-IMAGE_EXT: Final[set] = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff", ".svg", ".webp", ".ico"}
-VIDEO_EXT: Final[set] = {".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm"}
-AUDIO_EXT: Final[set] = {".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a"}
-ARCHIVE_EXT: Final[set] = {".zip", ".tar", ".gz", ".bz2", ".rar", ".7z", ".xz"}
-DOCUMENT_EXT: Final[set] = {".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".txt", ".md", ".odt", ".rtf"}
-CODE_EXT: Final[set] = {".py", ".js", ".ts", ".java", ".c", ".cpp", ".rs", ".go", ".rb", ".php", ".html", ".css", ".json", ".xml", ".yaml", ".yml"}
-BINARY_EXT: Final[set] = {".exe", ".dll", ".so", ".bin", ".dylib", ".app"}
+IMAGE_EXT: Final[FrozenSet[str]] = frozenset({".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff", ".svg", ".webp", ".ico"})
+VIDEO_EXT: Final[FrozenSet[str]] = frozenset({".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm"})
+AUDIO_EXT: Final[FrozenSet[str]] = frozenset({".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a"})
+ARCHIVE_EXT: Final[FrozenSet[str]] = frozenset({".zip", ".tar", ".gz", ".bz2", ".rar", ".7z", ".xz"})
+DOCUMENT_EXT: Final[FrozenSet[str]] = frozenset({".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".txt", ".md", ".odt", ".rtf"})
+CODE_EXT: Final[FrozenSet[str]] = frozenset({".py", ".js", ".ts", ".java", ".c", ".cpp", ".rs", ".go", ".rb", ".php", ".html", ".css", ".json", ".xml", ".yaml", ".yml"})
+BINARY_EXT: Final[FrozenSet[str]] = frozenset({".exe", ".dll", ".so", ".bin", ".dylib", ".app"})
+
+# Single lookup table built from the sets above
+_EXT_TO_TYPE: Final[Dict[str, str]] = {
+    **{ext: "image" for ext in IMAGE_EXT},
+    **{ext: "video" for ext in VIDEO_EXT},
+    **{ext: "audio" for ext in AUDIO_EXT},
+    **{ext: "archive" for ext in ARCHIVE_EXT},
+    **{ext: "document" for ext in DOCUMENT_EXT},
+    **{ext: "code" for ext in CODE_EXT},
+    **{ext: "binary" for ext in BINARY_EXT},
+}
 
 
 def classify_path(path: Path, is_dir: bool) -> str:
@@ -42,23 +53,7 @@ def classify_path(path: Path, is_dir: bool) -> str:
     """
     if is_dir:
         return "directory"
-
-    suffix = path.suffix.lower()
-    if suffix in IMAGE_EXT:
-        return "image"
-    if suffix in VIDEO_EXT:
-        return "video"
-    if suffix in AUDIO_EXT:
-        return "audio"
-    if suffix in ARCHIVE_EXT:
-        return "archive"
-    if suffix in DOCUMENT_EXT:
-        return "document"
-    if suffix in CODE_EXT:
-        return "code"
-    if suffix in BINARY_EXT:
-        return "binary"
-    return "other"
+    return _EXT_TO_TYPE.get(path.suffix.lower(), "other")
 
 
 def color_for_node(path: Path, is_dir: bool) -> str:
@@ -2,39 +2,59 @@
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable, List, Optional
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class DiskNode:
-    """Representation of a file system entry in the treemap."""
+    """Representation of a file system entry in the treemap.
+
+    Nodes compare and hash by identity so they can key the layout and search
+    sets; field-wise equality would recurse through the whole subtree. A scan
+    creates one node per entry, so they use slots rather than a __dict__.
+    """
 
     path: Path
     size: int
     is_dir: bool
     modified_ns: int
     children: List["DiskNode"] = field(default_factory=list)
+    # The directory's own mtime when its listing was read (0 for files or when
+    # listing failed or was read too soon after a change to trust); unlike
+    # modified_ns it is not aggregated over children.
+    listing_mtime_ns: int = 0
+    # Lowercased str(path) for case-insensitive search; derived if not given.
+    path_lower: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.path_lower:
+            self.path_lower = os.fspath(self.path).lower()
 
     @property
     def name(self) -> str:
         return self.path.name or str(self.path)
 
     def iter_all(self) -> Iterable["DiskNode"]:
-        """Yield this node and all of its descendants."""
+        """Yield this node and all of its descendants, parents first."""
 
-        yield self
-        for child in self.children:
-            yield from child.iter_all()
+        # An explicit stack avoids a generator frame per node and the
+        # recursion limit on deep trees.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
 
     def find_by_path(self, target: Path) -> Optional["DiskNode"]:
         """Find a node by path."""
 
-        if self.path == target:
-            return self
-        for child in self.children:
-            match = child.find_by_path(target)
-            if match:
-                return match
+        # Comparing the cached lowercase strings first skips building and
+        # comparing Path parts for every non-matching node.
+        target_lower = os.fspath(target).lower()
+        for node in self.iter_all():
+            if node.path_lower == target_lower and node.path == target:
+                return node
         return None
@@ -4,15 +4,32 @@ from __future__ import annotations
 
 import os
 import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from operator import attrgetter
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from stat import S_ISDIR, S_ISLNK
+from typing import FrozenSet, List, Optional, Tuple
 
 from .model import DiskNode
 
 
 # System directories and files to skip during scanning
-IGNORED_NAMES = {"$Recycle.Bin", "System Volume Information", "proc", "sys", "dev"}
+IGNORED_NAMES = frozenset({"$Recycle.Bin", "System Volume Information", "proc", "sys", "dev"})
+
+# Directories are listed on a shared pool; os.scandir and stat release the GIL.
+SCAN_WORKERS = (os.cpu_count() or 4) * 2
+_SCAN_POOL = ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="diskviz-scan")
+# Below the root, only directories with more subdirectories than this fan out.
+PARALLEL_MIN_SUBDIRS = 4
+# A listing read within this long of its directory's mtime is not reused by
+# rescans: on filesystems with coarse mtimes (FAT: 2 s, HFS+: 1 s) an entry
+# added later in the same tick would leave the mtime unchanged.
+RACY_LISTING_NS = 2_000_000_000
+
+_BY_SIZE = attrgetter("size")
+_BY_MTIME = attrgetter("modified_ns")
 
 
 @dataclass
@@ -30,22 +47,42 @@ class ScanStats:
     permission_denied: List[Path] = field(default_factory=list)
     errors: List[Path] = field(default_factory=list)
 
+    def merge(self, other: ScanStats) -> None:
+        """Add the counts and paths collected by another scan worker."""
+        self.files_scanned += other.files_scanned
+        self.dirs_scanned += other.dirs_scanned
+        self.permission_denied.extend(other.permission_denied)
+        self.errors.extend(other.errors)
+
+
+def _try_stat(
+    path: str, entry: Optional[os.DirEntry] = None, follow_symlinks: bool = True
+) -> Optional[os.stat_result]:
+    """Stat path (through its scandir entry if available), or None on error."""
+    try:
+        if entry is not None:
+            return entry.stat(follow_symlinks=follow_symlinks)
+        return os.stat(path, follow_symlinks=follow_symlinks)
+    except (FileNotFoundError, PermissionError, OSError):
+        return None
+
 
-def _safe_stat(path: Path) -> Tuple[int, int]:
+def _safe_stat(path: str, entry: Optional[os.DirEntry] = None) -> Tuple[int, int]:
     """Safely obtain file size and modification timestamp.
 
     Args:
         path: Path to file or directory to stat
+        entry: os.scandir entry for path, if available; its stat result is
+            cached, so no extra syscall is made when it was already fetched
 
     Returns:
         Tuple of (size_in_bytes, modification_time_in_nanoseconds)
         Returns (0, current_time) if stat fails
     """
-    try:
-        stat = path.stat()
-        return stat.st_size, stat.st_mtime_ns
-    except (FileNotFoundError, PermissionError, OSError):
+    stat = _try_stat(path, entry)
+    if stat is None:
         return 0, int(time.time_ns())
+    return stat.st_size, stat.st_mtime_ns
 
 
 def scan_directory(
@@ -63,79 +100,264 @@ def scan_directory(
     """
     root = root.expanduser().resolve()
     stats = ScanStats()
-    node = _scan_node(root, 0, max_depth, follow_symlinks, stats)
+    ancestors = frozenset() if follow_symlinks else None
+    node = _scan_node(os.fspath(root), 0, max_depth, follow_symlinks, stats, ancestors=ancestors)
     return node, stats
 
 
+def rescan_directory(
+    root: Path, previous: DiskNode, max_depth: int = 4, follow_symlinks: bool = False
+) -> Tuple[DiskNode, ScanStats]:
+    """Rescan root, reusing directory listings from a previous scan.
+
+    Directories whose own mtime is unchanged have the same entries as before,
+    so their listing is taken from previous instead of calling os.scandir.
+    Listings read within RACY_LISTING_NS of their directory's mtime are
+    never reused, as a later change may not have moved the mtime.
+    Every entry is still stat'ed, so size and mtime changes are picked up.
+    previous must come from a scan with the same max_depth and follow_symlinks.
+
+    Args:
+        root: Root directory to scan
+        previous: Tree from an earlier scan of root
+        max_depth: Maximum depth to recurse into subdirectories
+        follow_symlinks: Whether to follow symbolic links
+
+    Returns:
+        Tuple of (DiskNode tree, ScanStats with collection statistics)
+    """
+    root = root.expanduser().resolve()
+    stats = ScanStats()
+    ancestors = frozenset() if follow_symlinks else None
+    node = _scan_node(
+        os.fspath(root),
+        0,
+        max_depth,
+        follow_symlinks,
+        stats,
+        previous if previous.path == root else None,
+        ancestors=ancestors,
+    )
+    return node, stats
+
+
+def _entry_kind(
+    path: str, entry: Optional[os.DirEntry], follow_symlinks: bool
+) -> Tuple[bool, bool, Optional[os.stat_result]]:
+    """Return (is_symlink, is_dir, stat) for path, preferring the scandir entry.
+
+    A symlink's target is only looked at when following symlinks; otherwise
+    it is reported as not a directory without an extra stat call. Without an
+    entry, path is lstat'ed and the result returned so the caller need not
+    stat it again, unless it is a symlink being followed (whose lstat is not
+    its stat). Otherwise stat is None.
+    """
+    if entry is None:
+        try:
+            stat = os.lstat(path)
+        except OSError:
+            return False, False, None
+        if S_ISLNK(stat.st_mode):
+            if follow_symlinks:
+                return True, os.path.isdir(path), None
+            return True, False, stat
+        return False, S_ISDIR(stat.st_mode), stat
+    # DirEntry answers these from the d_type scandir already fetched.
+    is_symlink = entry.is_symlink()
+    if is_symlink and not follow_symlinks:
+        return True, False, None
+    try:
+        return is_symlink, entry.is_dir(), None
+    except OSError:
+        return is_symlink, False, None
+
+
 def _scan_node(
-    path: Path, depth: int, max_depth: int, follow_symlinks: bool, stats: ScanStats
+    path: str,
+    depth: int,
+    max_depth: int,
+    follow_symlinks: bool,
+    stats: ScanStats,
+    previous: Optional[DiskNode] = None,
+    entry: Optional[os.DirEntry] = None,
+    ancestors: Optional[FrozenSet[Tuple[int, int]]] = None,
 ) -> DiskNode:
     """Recursively scan a single filesystem node.
 
     Args:
-        path: Path to scan
+        path: Path to scan, as a string; a Path is only built for the DiskNode
         depth: Current recursion depth
         max_depth: Maximum depth to recurse
         follow_symlinks: Whether to follow symbolic links
         stats: Statistics collector
+        previous: Node for the same path from an earlier scan, if any
+        entry: os.scandir entry for path, used to avoid re-stat'ing it
+        ancestors: (st_dev, st_ino) of the directories above path, when
+            following symlinks; a directory that is its own ancestor is
+            reached through a symlink loop and is not listed again
 
     Returns:
         DiskNode representing this path and its children
     """
-    if not follow_symlinks and path.is_symlink():
-        target = path.resolve()
-        size, mtime = _safe_stat(target)
+    is_symlink, is_dir, own_stat = _entry_kind(path, entry, follow_symlinks)
+    node_path = Path(path)
+
+    if not follow_symlinks and is_symlink:
+        # Count the link itself, not its target: it takes no space of its own
+        # and the target is (or is not) counted where it lives.
+        link_stat = own_stat if own_stat is not None else _try_stat(path, entry, follow_symlinks=False)
+        mtime = link_stat.st_mtime_ns if link_stat is not None else int(time.time_ns())
         stats.files_scanned += 1
-        return DiskNode(path, size, False, mtime, [])
+        return DiskNode(node_path, 0, False, mtime, [], 0, path.lower())
 
-    if path.is_dir():
+    if is_dir:
         size = 0
         mtime = 0
         children = []
-        if depth < max_depth:
-            try:
-                with os.scandir(path) as it:
-                    entries = sorted(it, key=lambda e: (e.is_file(), e.name.lower()))
-            except PermissionError:
-                stats.permission_denied.append(path)
-                entries = []
-            except (FileNotFoundError, OSError) as e:
-                stats.errors.append(path)
-                entries = []
-
-            for entry in entries:
-                if entry.name in IGNORED_NAMES:
-                    continue
-                child_path = Path(entry.path)
-                child_node = _scan_node(child_path, depth + 1, max_depth, follow_symlinks, stats)
-                size += child_node.size
-                mtime = max(mtime, child_node.modified_ns)
-                children.append(child_node)
+        listing_mtime = 0
+        dir_stat = own_stat if own_stat is not None else _try_stat(path, entry)
+        if dir_stat is None:
+            dir_size, dir_mtime = 0, int(time.time_ns())
         else:
-            children = []
-            # Directory summary when max depth reached
-            size, mtime = _safe_stat(path)
+            dir_size, dir_mtime = dir_stat.st_size, dir_stat.st_mtime_ns
+        # Only true cycles are cut: a directory also reachable through a
+        # link elsewhere is listed at both places, so the result does not
+        # depend on which one is scanned first.
+        in_cycle = False
+        child_ancestors = ancestors
+        # Some platforms report no inode numbers; those cannot be tracked.
+        if ancestors is not None and dir_stat is not None and dir_stat.st_ino:
+            key = (dir_stat.st_dev, dir_stat.st_ino)
+            in_cycle = key in ancestors
+            child_ancestors = ancestors | {key}
+        if depth < max_depth and not in_cycle:
+            if previous is not None and previous.listing_mtime_ns and previous.listing_mtime_ns == dir_mtime:
+                # Same directory mtime means the same entries; skip os.scandir.
+                pending = [(os.fspath(child.path), None, child) for child in previous.children]
+                listing_mtime = dir_mtime
+            else:
+                try:
+                    with os.scandir(path) as it:
+                        entries = [child for child in it if child.name not in IGNORED_NAMES]
+                    if time.time_ns() - dir_mtime > RACY_LISTING_NS:
+                        listing_mtime = dir_mtime
+                except PermissionError:
+                    stats.permission_denied.append(node_path)
+                    entries = []
+                except (FileNotFoundError, OSError) as e:
+                    stats.errors.append(node_path)
+                    entries = []
+                previous_children = {}
+                if previous is not None and previous.is_dir:
+                    previous_children = {child.path.name: child for child in previous.children}
+                pending = [(child.path, child, previous_children.get(child.name)) for child in entries]
+
+            children = _scan_children(pending, depth + 1, max_depth, follow_symlinks, stats, child_ancestors)
+            if children:
+                size = sum(map(_BY_SIZE, children))
+                mtime = max(map(_BY_MTIME, children))
 
-        dir_size, dir_mtime = _safe_stat(path)
+        # At max depth this is the directory's own stat, taken once above.
         size = max(size, dir_size)
         mtime = max(mtime, dir_mtime)
-        children.sort(key=lambda node: node.size, reverse=True)
+        children.sort(key=_BY_SIZE, reverse=True)
         stats.dirs_scanned += 1
-        return DiskNode(path, size, True, mtime, children)
+        return DiskNode(node_path, size, True, mtime, children, listing_mtime, path.lower())
 
-    size, mtime = _safe_stat(path)
+    if own_stat is not None:
+        size, mtime = own_stat.st_size, own_stat.st_mtime_ns
+    else:
+        size, mtime = _safe_stat(path, entry)
     stats.files_scanned += 1
-    return DiskNode(path, size, False, mtime, [])
+    return DiskNode(node_path, size, False, mtime, [], 0, path.lower())
+
+
+def _scan_children(
+    pending: List[Tuple[str, Optional[os.DirEntry], Optional[DiskNode]]],
+    depth: int,
+    max_depth: int,
+    follow_symlinks: bool,
+    stats: ScanStats,
+    ancestors: Optional[FrozenSet[Tuple[int, int]]],
+) -> List[DiskNode]:
+    """Scan the children of a directory, fanning subdirectories out to the pool.
 
+    The root's subdirectories, and those of any directory with more than
+    PARALLEL_MIN_SUBDIRS of them, are submitted to the shared pool; files and
+    smaller directories are scanned on the calling thread. Each pool task
+    collects into its own ScanStats, merged into stats once it is done.
 
-def flatten_snapshot(node: DiskNode) -> Iterable[Tuple[Path, int, int]]:
+    Args:
+        pending: (path, scandir entry or None, previous node or None)
+            triples for the children
+        depth: Depth of the children
+        max_depth: Maximum depth to recurse
+        follow_symlinks: Whether to follow symbolic links
+        stats: Statistics collector for the scan
+        ancestors: (st_dev, st_ino) of the directories above the children,
+            when following symlinks
+
+    Returns:
+        Child nodes, in the order of pending
+    """
+    subdirs = []
+    if depth < max_depth:
+        for position, (child_path, child_entry, previous) in enumerate(pending):
+            if child_entry is None:
+                # A reused listing; the previous scan's answer is good enough
+                # for scheduling, and _scan_node checks the path itself.
+                is_dir = previous is not None and previous.is_dir
+            else:
+                is_dir = _entry_kind(child_path, child_entry, follow_symlinks)[1]
+            if is_dir:
+                subdirs.append(position)
+    if len(subdirs) < 2 or (depth > 1 and len(subdirs) <= PARALLEL_MIN_SUBDIRS):
+        return [
+            _scan_node(child_path, depth, max_depth, follow_symlinks, stats, previous, child_entry, ancestors)
+            for child_path, child_entry, previous in pending
+        ]
+
+    # Results keep listing order rather than completion order, so equal-sized
+    # children (and hence snapshot digests) come out the same on every scan.
+    children: List[Optional[DiskNode]] = [None] * len(pending)
+    tasks = []
+    for position in subdirs:
+        child_path, child_entry, previous = pending[position]
+        task_stats = ScanStats()
+        args = (child_path, depth, max_depth, follow_symlinks, task_stats, previous, child_entry, ancestors)
+        tasks.append((position, task_stats, args, _SCAN_POOL.submit(_scan_node, *args)))
+    queued = set(subdirs)
+    for position, (child_path, child_entry, previous) in enumerate(pending):
+        if position not in queued:
+            children[position] = _scan_node(
+                child_path, depth, max_depth, follow_symlinks, stats, previous, child_entry, ancestors
+            )
+    for position, task_stats, args, future in tasks:
+        # Nested fan-outs share one bounded pool: a task that has not started
+        # yet is run here instead of waited on, so waiting never deadlocks.
+        children[position] = _scan_node(*args) if future.cancel() else future.result()
+        stats.merge(task_stats)
+    return children
+
+
+def flatten_snapshot(node: DiskNode) -> Tuple[List[Path], array, array]:
     """Produce a flat snapshot of path metadata for change detection.
 
+    The metadata is returned as parallel columns, in the same order, so two
+    snapshots of an unchanged tree compare equal column by column.
+
     Args:
         node: Root node to flatten
 
-    Yields:
-        Tuples of (path, size, modification_time) for all nodes in the tree
+    Returns:
+        Tuple of (paths, sizes, modification_times) for all nodes in the
+        tree; sizes and times are signed 64-bit arrays
     """
+    paths: List[Path] = []
+    sizes = array("q")
+    mtimes = array("q")
     for item in node.iter_all():
-        yield (item.path, item.size, item.modified_ns)
+        paths.append(item.path)
+        sizes.append(item.size)
+        mtimes.append(item.modified_ns)
+    return paths, sizes, mtimes
@@ -0,0 +1,81 @@
+"""Path search index for DiskViz."""
+
+from __future__ import annotations
+
+import os
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from .model import DiskNode
+
+
+class TrigramIndex:
+    """Case-insensitive substring search over the paths of a scanned tree.
+
+    Every node's name is split into trigrams (3-character substrings). A
+    query without a path separator can only match a node's path inside one
+    component, so its hits are the nodes whose own name contains it plus
+    their whole subtrees. Those names are found by checking only the nodes
+    listed under the query's rarest trigram instead of every path.
+    """
+
+    def __init__(self, root: DiskNode):
+        """Index root and all of its descendants.
+
+        Args:
+            root: Root of the scanned tree
+        """
+        self._root = root
+        self._nodes: List[DiskNode] = []
+        self._names: List[str] = []
+        parents: List[int] = []
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            parents.append(parent)
+            index = len(self._nodes)
+            self._nodes.append(node)
+            self._names.append(node.name.lower())
+            stack.extend((child, index) for child in reversed(node.children))
+
+        # Nodes are listed parents first, so each subtree is a contiguous run.
+        self._subtree_sizes = [1] * len(self._nodes)
+        for index in range(len(self._nodes) - 1, 0, -1):
+            self._subtree_sizes[parents[index]] += self._subtree_sizes[index]
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for index, name in enumerate(self._names):
+            for trigram in {name[i:i + 3] for i in range(len(name) - 2)}:
+                postings[trigram].append(index)
+        # Compact unsigned arrays take a fraction of the memory of int lists.
+        self._postings: Dict[str, array] = {trigram: array("I", indices) for trigram, indices in postings.items()}
+
+    def search(self, query: str) -> Set[DiskNode]:
+        """Return every indexed node whose lowercased path contains query.
+
+        Args:
+            query: Lowercased search text
+
+        Returns:
+            Set of matching nodes
+        """
+        if query in self._root.path_lower:
+            # Part of the scanned folder's own path; every node matches.
+            return set(self._nodes)
+        if len(query) < 3 or os.sep in query or (os.altsep and os.altsep in query):
+            return {node for node in self._nodes if query in node.path_lower}
+
+        postings = [self._postings.get(query[i:i + 3]) for i in range(len(query) - 2)]
+        if not all(postings):
+            return set()
+        names = self._names
+        sizes = self._subtree_sizes
+        covered = bytearray(len(self._nodes))
+        for index in min(postings, key=len):
+            # Postings are in index order, so a hit inside an earlier hit's
+            # subtree is already covered.
+            if covered[index] or query not in names[index]:
+                continue
+            covered[index:index + sizes[index]] = b"\x01" * sizes[index]
+        return {node for node, hit in zip(self._nodes, covered) if hit}
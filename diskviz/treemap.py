@@ -3,15 +3,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Sequence, Tuple
+from functools import lru_cache
+from operator import attrgetter
+from typing import AbstractSet, Iterable, List, Optional, Sequence, Tuple
 
 from .model import DiskNode
 
+# Layouts kept by cached_slice_and_dice, so navigating back skips the layout
+LAYOUT_CACHE_SIZE = 8
 
-@dataclass
+_BY_SIZE = attrgetter("size")
+
+
+@dataclass(frozen=True, slots=True)
 class Rect:
     """Rectangle bounds for treemap layout.
 
+    Rects are immutable, so they can key the layout cache.
+
     Attributes:
         x: Left edge coordinate
         y: Top edge coordinate
@@ -39,7 +48,7 @@ class Rect:
             max(0.0, self.height - 2 * padding),
         )
 
-@dataclass
+@dataclass(slots=True)
 class NodeRect:
     """Represents a DiskNode with its treemap layout rectangle.
 
@@ -48,11 +57,14 @@ class NodeRect:
         rect: Layout rectangle for this node
         depth: Tree depth of this node
         parent: Parent DiskNode, if any
+        parent_index: Position of the parent's entry in the same layout list,
+            or -1 for the root
     """
     node: DiskNode
     rect: Rect
     depth: int
     parent: Optional[DiskNode]
+    parent_index: int = -1
 
 
 def slice_and_dice(
@@ -61,6 +73,8 @@ def slice_and_dice(
     depth: int = 0,
     parent: Optional[DiskNode] = None,
     max_depth: Optional[int] = None,
+    min_size: float = 0.0,
+    min_area: float = 0.0,
 ) -> List[NodeRect]:
     """Compute a treemap layout using the slice-and-dice algorithm.
 
@@ -74,18 +88,109 @@ def slice_and_dice(
         depth: Current tree depth (controls slice direction)
         parent: Parent node, if any
         max_depth: Maximum depth to recurse (None for entire tree)
+        min_size: Do not subdivide rectangles narrower or shorter than this;
+            their children would be too small to be visible
+        min_area: Do not subdivide rectangles with a smaller area than this
 
     Returns:
         List of NodeRect entries for the entire tree
     """
-    layouts: List[NodeRect] = [NodeRect(node=node, rect=bounds, depth=depth, parent=parent)]
+    layouts: List[NodeRect] = []
+    _layout_into(layouts, node, bounds, depth, parent, -1, max_depth, min_size, min_area)
+    return layouts
+
+
+def _layout_into(
+    acc: List[NodeRect],
+    node: DiskNode,
+    bounds: Rect,
+    depth: int,
+    parent: Optional[DiskNode],
+    parent_index: int,
+    max_depth: Optional[int],
+    min_size: float,
+    min_area: float,
+) -> None:
+    """Append the layout of node's subtree to acc, parents first."""
+    index = len(acc)
+    acc.append(NodeRect(node=node, rect=bounds, depth=depth, parent=parent, parent_index=parent_index))
     if not node.children or node.size <= 0 or (max_depth is not None and depth >= max_depth):
-        return layouts
+        return
+    if bounds.width < min_size or bounds.height < min_size or bounds.width * bounds.height < min_area:
+        return
 
-    child_layouts = _squarify_children(node.children, bounds)
-    for child, child_rect in child_layouts:
-        layouts.extend(slice_and_dice(child, child_rect, depth + 1, node, max_depth))
-    return layouts
+    for child, child_rect in _squarify_children(node.children, bounds):
+        _layout_into(acc, child, child_rect, depth + 1, node, index, max_depth, min_size, min_area)
+
+
+def cached_slice_and_dice(
+    node: DiskNode,
+    bounds: Rect,
+    max_depth: Optional[int] = None,
+    min_size: float = 0.0,
+    min_area: float = 0.0,
+) -> List[NodeRect]:
+    """Memoized slice_and_dice for a whole tree, keyed by node identity and bounds.
+
+    The returned list is shared between callers and must not be modified.
+    Call clear_layout_cache() when the tree is replaced or changed.
+
+    Args:
+        node: Root node to layout
+        bounds: Available rectangle bounds
+        max_depth: Maximum depth to recurse (None for entire tree)
+        min_size: As for slice_and_dice
+        min_area: As for slice_and_dice
+
+    Returns:
+        List of NodeRect entries for the entire tree
+    """
+    return _cached_layout(node, bounds, max_depth, min_size, min_area)
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _cached_layout(
+    node: DiskNode, bounds: Rect, max_depth: Optional[int], min_size: float, min_area: float
+) -> List[NodeRect]:
+    return slice_and_dice(node, bounds, max_depth=max_depth, min_size=min_size, min_area=min_area)
+
+
+def clear_layout_cache() -> None:
+    """Drop every cached layout, e.g. after a rescan replaced the tree."""
+    _cached_layout.cache_clear()
+
+
+def count_unlaid(layouts: Sequence[NodeRect], max_depth: Optional[int] = None) -> int:
+    """Count the nodes within max_depth that a culled layout left out.
+
+    slice_and_dice lays out either all of a node's children or none of them,
+    so the nodes missing from layouts are the subtrees below entries that
+    have children but no laid-out child entries.
+
+    Args:
+        layouts: Layout produced by slice_and_dice with the same max_depth
+        max_depth: Maximum depth the layout was computed for
+
+    Returns:
+        Number of nodes that were not laid out because they were too small
+    """
+    has_entries = bytearray(len(layouts))
+    for layout in layouts:
+        if layout.parent_index >= 0:
+            has_entries[layout.parent_index] = 1
+    total = 0
+    for index, layout in enumerate(layouts):
+        if has_entries[index] or not layout.node.children:
+            continue
+        if max_depth is not None and layout.depth >= max_depth:
+            continue
+        stack = [(child, layout.depth + 1) for child in layout.node.children]
+        while stack:
+            node, depth = stack.pop()
+            total += 1
+            if node.children and (max_depth is None or depth < max_depth):
+                stack.extend((child, depth + 1) for child in node.children)
+    return total
 
 
 def _squarify_children(children: Sequence[DiskNode], bounds: Rect) -> List[Tuple[DiskNode, Rect]]:
@@ -93,105 +198,103 @@ def _squarify_children(children: Sequence[DiskNode], bounds: Rect) -> List[Tuple
     if not children:
         return []
 
-    sorted_children = sorted(children, key=lambda c: c.size, reverse=True)
-    total_size = sum(max(child.size, 1) for child in sorted_children) or 1
+    # Scanned children are already largest-first, which makes this sort linear.
+    sorted_children = sorted(children, key=_BY_SIZE, reverse=True)
+    sizes = [max(child.size, 1) for child in sorted_children]
+    total_size = sum(sizes) or 1
     total_area = bounds.width * bounds.height or 1
-    areas = [(child, max(child.size, 1) / total_size * total_area) for child in sorted_children]
-
-    result: List[Tuple[DiskNode, Rect]] = []
-    _squarify(areas, [], bounds, result, depth_limit=2000)
-    return result
-
-
-def _squarify(
-    items: Sequence[Tuple[DiskNode, float]],
-    row: List[Tuple[DiskNode, float]],
-    rect: Rect,
-    acc: List[Tuple[DiskNode, Rect]],
-    depth_limit: int,
-) -> None:
-    if depth_limit <= 0:
-        # Fallback to simple slicing to prevent recursion blow-up
-        _layout_simple(items, rect, acc)
-        return
-    if not items:
-        if row:
-            _layout_row(row, rect, acc)
-        return
+    areas = [size / total_size * total_area for size in sizes]
+    return list(zip(sorted_children, _squarify(areas, bounds)))
 
-    first = items[0]
-    new_row = row + [first]
-    if not row or _worst_ratio(new_row, rect) <= _worst_ratio(row, rect):
-        _squarify(items[1:], new_row, rect, acc, depth_limit - 1)
-    else:
-        new_rect = _layout_row(row, rect, acc)
-        _squarify(items, [], new_rect, acc, depth_limit - 1)
 
+def _squarify(areas: Sequence[float], rect: Rect) -> List[Rect]:
+    """Greedily pack areas into rows, starting a new row when the aspect worsens.
 
-def _layout_simple(
-    items: Sequence[Tuple[DiskNode, float]],
-    rect: Rect,
-    acc: List[Tuple[DiskNode, Rect]],
-) -> None:
-    if not items:
-        return
-    horizontal = rect.width >= rect.height
-    total = sum(area for _, area in items) or 1
-    offset = 0.0
-    for child, area in items:
-        ratio = area / total
-        if horizontal:
-            width = rect.width * ratio
-            acc.append((child, Rect(rect.x + offset, rect.y, width, rect.height)))
-            offset += width
+    Works on plain floats; the rectangle at position i belongs to areas[i],
+    so callers pair the result back up with their nodes. A row is always a
+    contiguous run of areas, and its sum, minimum and maximum are tracked as
+    areas are added, so testing the next area costs O(1).
+    """
+    acc: List[Rect] = []
+    row_start = 0
+    row_area = row_total = row_min = row_max = 0.0
+    row_worst = float("inf")
+    side_sq = max(min(rect.width, rect.height), 1e-6) ** 2
+    index = 0
+    count = len(areas)
+    while index < count:
+        raw_area = areas[index]
+        area = max(raw_area, 1e-6)
+        if index == row_start:
+            row_area = raw_area
+            row_total = row_min = row_max = area
+            row_worst = _worst_ratio(side_sq, row_total, row_min, row_max)
+            index += 1
+            continue
+        total = row_total + area
+        min_area = min(row_min, area)
+        max_area = max(row_max, area)
+        worst = _worst_ratio(side_sq, total, min_area, max_area)
+        if worst <= row_worst:
+            row_area += raw_area
+            row_total, row_min, row_max, row_worst = total, min_area, max_area, worst
+            index += 1
         else:
-            height = rect.height * ratio
-            acc.append((child, Rect(rect.x, rect.y + offset, rect.width, height)))
-            offset += height
+            rect = _layout_row(areas, row_start, index, row_area, rect, acc)
+            side_sq = max(min(rect.width, rect.height), 1e-6) ** 2
+            row_start = index
+    if row_start < count:
+        _layout_row(areas, row_start, count, row_area, rect, acc)
+    return acc
 
 
 def _layout_row(
-    row: Sequence[Tuple[DiskNode, float]],
+    areas: Sequence[float],
+    start: int,
+    end: int,
+    row_area: float,
     rect: Rect,
-    acc: List[Tuple[DiskNode, Rect]],
+    acc: List[Rect],
 ) -> Rect:
-    """Lay out a row either horizontally or vertically."""
-    if not row:
-        return rect
+    """Lay out areas[start:end], totalling row_area, along the longer side of rect.
 
-    row_area = sum(area for _, area in row)
+    Returns:
+        The part of rect left over for the following rows
+    """
     horizontal = rect.width >= rect.height
     if horizontal:
         row_height = row_area / max(rect.width, 1e-6)
         x = rect.x
-        for child, area in row:
-            width = area / max(row_height, 1e-6)
-            acc.append((child, Rect(x, rect.y, width, row_height)))
+        for index in range(start, end):
+            width = areas[index] / max(row_height, 1e-6)
+            acc.append(Rect(x, rect.y, width, row_height))
             x += width
         return Rect(rect.x, rect.y + row_height, rect.width, max(rect.height - row_height, 0))
 
     row_width = row_area / max(rect.height, 1e-6)
     y = rect.y
-    for child, area in row:
-        height = area / max(row_width, 1e-6)
-        acc.append((child, Rect(rect.x, y, row_width, height)))
+    for index in range(start, end):
+        height = areas[index] / max(row_width, 1e-6)
+        acc.append(Rect(rect.x, y, row_width, height))
         y += height
     return Rect(rect.x + row_width, rect.y, max(rect.width - row_width, 0), rect.height)
 
 
-def _worst_ratio(row: Sequence[Tuple[DiskNode, float]], rect: Rect) -> float:
-    """Measure how 'square' the row would be in the remaining rectangle."""
-    if not row:
-        return float("inf")
-    short_side = max(min(rect.width, rect.height), 1e-6)
-    areas = [max(area, 1e-6) for _, area in row]
-    total = sum(areas)
-    max_area = max(areas)
-    min_area = min(areas)
-    return max((short_side ** 2 * max_area) / (total ** 2), (total ** 2) / (short_side ** 2 * min_area))
+def _worst_ratio(side_sq: float, total: float, min_area: float, max_area: float) -> float:
+    """Measure how 'square' a row with these area statistics would be.
 
+    side_sq is the squared short side of the remaining rectangle, which
+    stays the same for the whole row, so callers square it once per row.
+    """
+    total_sq = total * total
+    return max((side_sq * max_area) / total_sq, total_sq / (side_sq * min_area))
 
-def filter_layout(layouts: Sequence[NodeRect], query: str) -> Iterable[NodeRect]:
+
+def filter_layout(
+    layouts: Sequence[NodeRect],
+    query: str,
+    matches: Optional[AbstractSet[DiskNode]] = None,
+) -> Iterable[NodeRect]:
     """Yield layout entries matching the query or having matching descendants.
 
     The filter includes:
@@ -202,6 +305,8 @@ def filter_layout(layouts: Sequence[NodeRect], query: str) -> Iterable[NodeRect]
     Args:
         layouts: Complete treemap layout to filter
         query: Search query (case-insensitive)
+        matches: Nodes already known to match the query (e.g. from a search
+            index); when given, paths are not re-checked against the query
 
     Yields:
         NodeRect entries that match or provide context
@@ -210,28 +315,64 @@ def filter_layout(layouts: Sequence[NodeRect], query: str) -> Iterable[NodeRect]
         yield from layouts
         return
 
-    normalized = query.lower()
-    parent_map = {layout.node: layout.parent for layout in layouts}
-    matching_nodes = {layout.node for layout in layouts if normalized in str(layout.node.path).lower()}
-
-    # Include ancestors of matches.
-    for node in list(matching_nodes):
-        parent = parent_map.get(node)
-        while parent:
-            if parent in matching_nodes:
-                break
-            matching_nodes.add(parent)
-            parent = parent_map.get(parent)
-
-    # Include descendants of matching directories for context.
-    added = True
-    while added:
-        added = False
-        for layout in layouts:
-            parent = parent_map.get(layout.node)
-            if parent and parent in matching_nodes and layout.node not in matching_nodes:
-                matching_nodes.add(layout.node)
-                added = True
-    for layout in layouts:
-        if layout.node in matching_nodes:
+    mask = match_mask(layouts, query, matches)
+    for index, layout in enumerate(layouts):
+        if mask[index]:
             yield layout
+
+
+def match_mask(
+    layouts: Sequence[NodeRect],
+    query: str,
+    matches: Optional[AbstractSet[DiskNode]] = None,
+    ancestors: Optional[AbstractSet[DiskNode]] = None,
+) -> bytearray:
+    """Compute which layout entries filter_layout would keep.
+
+    Args:
+        layouts: Complete treemap layout, parents before children as
+            produced by slice_and_dice
+        query: Search query (case-insensitive)
+        matches: Nodes already known to match the query, as for filter_layout
+        ancestors: Nodes with a match somewhere below them in the full tree.
+            A layout culled by max_depth, min_size or min_area can leave
+            those matches out, so their ancestors are kept from this set.
+
+    Returns:
+        One byte per layout entry: 1 if it is kept, 0 otherwise
+    """
+    count = len(layouts)
+    if not query:
+        return bytearray(b"\x01") * count
+
+    normalized = query.lower()
+    parent_index = [layout.parent_index for layout in layouts]
+    mask = bytearray(count)
+    for index, layout in enumerate(layouts):
+        if matches is not None:
+            if layout.node in matches:
+                mask[index] = 1
+        elif normalized in layout.node.path_lower:
+            mask[index] = 1
+
+    # Include descendants of matching directories for context. Parents come
+    # first, so one forward pass reaches every level. This runs before the
+    # ancestors are added so it only expands from actual matches.
+    for index in range(count):
+        parent = parent_index[index]
+        if parent >= 0 and mask[parent]:
+            mask[index] = 1
+
+    if ancestors:
+        for index, layout in enumerate(layouts):
+            if layout.node in ancestors:
+                mask[index] = 1
+
+    # Include ancestors of matches. Entries are visited parents first, so a
+    # marked ancestor already has its own chain marked and the walk stops there.
+    for index in [index for index in range(count) if mask[index]]:
+        parent = parent_index[index]
+        while parent >= 0 and not mask[parent]:
+            mask[parent] = 1
+            parent = parent_index[parent]
+    return mask
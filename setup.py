@@ -29,6 +29,19 @@ OPTIONS = {
         'matplotlib',
         'pandas',
         'PIL',
+        # Stdlib the app never imports (checked with python -X importtime)
+        'tkinter.test',
+        'tkinter.tix',
+        'lib2to3',
+        'turtle',
+        'turtledemo',
+        'idlelib',
+        'ensurepip',
+        'venv',
+        'pyexpat',
+        'email',
+        'html',
+        'http',
     ],
     'iconfile': str(ICON_PATH) if ICON_PATH.exists() else None,
     'plist': {
@@ -50,5 +63,6 @@ setup(
     app=APP,
     data_files=DATA_FILES,
     options={'py2app': OPTIONS},
+    python_requires='>=3.10',  # dataclass(slots=True)
     setup_requires=['py2app'],
 )